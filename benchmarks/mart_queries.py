@@ -0,0 +1,181 @@
+"""Times the DBT build and dashboard queries on generated fleets of several sizes.
+
+Fleets are generated with pulse_analytics.generator (no Spark), seeded into a DuckDB file,
+and built with `dbt run`. Each result is printed as a JSON line (and written to --output).
+With --baseline, results are compared with a previous output file and the script exits
+with status 1 if a timing is slower than the baseline by more than --tolerance.
+
+Usage: python benchmarks/mart_queries.py --sizes small medium --output results.json --baseline baseline.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import duckdb
+from pulse_analytics.generator import Fleet, generate
+
+dbt_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../dbt/")
+
+fleets = {  # devices x tests x cycles x (3 steps x points per step) records
+    "small": Fleet(num_devices=10, num_tests=2, num_cycles=10, points_per_step=100),
+    "medium": Fleet(num_devices=50, num_tests=4, num_cycles=20, points_per_step=100),
+    "large": Fleet(num_devices=100, num_tests=4, num_cycles=50, points_per_step=200),
+}
+
+queries = {  # name, dashboard query on the marts (parameters are the first device, test, and part)
+    "part_cycle_trend": """
+        SELECT part_cycle_number, charge_capacity__Ah, discharge_capacity__Ah
+        FROM analytics.part_statistics_cycle WHERE part_id = $part_id ORDER BY part_cycle_number
+    """,
+    "part_cycle_slice": """
+        SELECT timestamp, voltage__V, current__A FROM analytics.part_telemetry
+        WHERE part_id = $part_id AND part_cycle_number BETWEEN 2 AND 4 ORDER BY part_record_number
+    """,
+    "test_step_table": """
+        SELECT * FROM analytics.test_statistics_step
+        WHERE device_id = $device_id AND test_id = $test_id ORDER BY step_number
+    """,
+    "test_voltage_1m": """
+        SELECT bucket_start, min_voltage__V, max_voltage__V, mean_voltage__V FROM analytics.test_telemetry_1m
+        WHERE device_id = $device_id AND test_id = $test_id ORDER BY bucket_start
+    """,
+    "fleet_last_cycle": """
+        SELECT device_id, MAX(cycle_number), MAX_BY(discharge_capacity__Ah, cycle_number)
+        FROM analytics.test_statistics_cycle GROUP BY device_id
+    """,
+    "fleet_part_extent": """
+        SELECT part_id, MAX(part_cycle_number), MAX(part_record_number) FROM analytics.part_telemetry GROUP BY part_id
+    """,
+}
+
+
+def environment(duckdb_path, materialization):
+    # Same sources as the DuckDB test environment ('test' is the catalog)
+    return dict(
+        os.environ,
+        PULSE_ANALYTICS_DUCKDB_PATH=duckdb_path,
+        PULSE_ANALYTICS_TARGET_SCHEMA="analytics",
+        PULSE_ANALYTICS_TELEMETRY_CATALOG="test",
+        PULSE_ANALYTICS_TELEMETRY_SCHEMA="telemetry",
+        PULSE_ANALYTICS_TELEMETRY_TABLE="telemetry",
+        PULSE_ANALYTICS_STATISTICS_STEP_TABLE="statistics_step",
+        PULSE_ANALYTICS_STATISTICS_CYCLE_TABLE="statistics_cycle",
+        PULSE_ANALYTICS_METADATA_CATALOG="test",
+        PULSE_ANALYTICS_METADATA_SCHEMA="metadata",
+        PULSE_ANALYTICS_DEVICE_METADATA_TABLE="device_metadata",
+        PULSE_ANALYTICS_PART_METADATA_TABLE="part_metadata",
+        PULSE_ANALYTICS_RECIPE_METADATA_TABLE="recipe_metadata",
+        PULSE_ANALYTICS_DEVICE_TEST_PART_TABLE="device_test_part",
+        PULSE_ANALYTICS_DEVICE_TEST_RECIPE_TABLE="device_test_recipe",
+        PULSE_ANALYTICS_MARTS_MATERIALIZATION=materialization,
+    )
+
+
+def seed(duckdb_path, fleet):
+    conn = duckdb.connect(duckdb_path)
+    conn.execute("CREATE SCHEMA telemetry")
+    conn.execute("CREATE SCHEMA metadata")
+    for name, table in generate(fleet).items():
+        conn.register("source", table)
+        conn.execute(f"CREATE TABLE {name} AS SELECT * FROM source")
+        conn.unregister("source")
+    conn.close()
+
+
+def build(duckdb_path, materialization):
+    start = time.perf_counter()
+    subprocess.run(
+        ["dbt", "run", "--target", "duckdb", "--profiles-dir", "."],
+        cwd=dbt_dir,
+        env=environment(duckdb_path, materialization),
+        stdout=subprocess.DEVNULL,
+        check=True,
+    )
+    return time.perf_counter() - start
+
+
+def time_query(conn, query, parameters, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        conn.execute(query, parameters).fetchall()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def benchmark(size, fleet, materialization, repeats):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        duckdb_path = os.path.join(tmp_dir, "test.duckdb")
+        seed(duckdb_path, fleet)
+        results = [{"size": size, "query": "dbt_run", "num_records": fleet.num_records}]
+        results[0]["seconds"] = round(build(duckdb_path, materialization), 4)
+
+        conn = duckdb.connect(duckdb_path, read_only=True)
+        device_id, test_id, part_id = conn.execute(
+            "SELECT device_id, test_id, part_id FROM analytics.test_part_offsets ORDER BY part_id, start_time LIMIT 1"
+        ).fetchone()
+        parameters = {"device_id": device_id, "test_id": test_id, "part_id": part_id}
+        for name, query in queries.items():
+            used = {key: value for key, value in parameters.items() if f"${key}" in query}
+            seconds = time_query(conn, query, used, repeats)
+            results.append(
+                {"size": size, "query": name, "num_records": fleet.num_records, "seconds": round(seconds, 4)}
+            )
+        conn.close()
+    return results
+
+
+noise_seconds = 0.002  # Allowed slowdown of sub-millisecond queries (timer and scheduling noise)
+
+
+def check_regressions(results, baseline, tolerance):
+    # Marks results slower than the baseline by more than the tolerance (relative)
+    previous = {(result["size"], result["query"]): result["seconds"] for result in baseline}
+    regressions = []
+    for result in results:
+        key = (result["size"], result["query"])
+        if key in previous:
+            result["baseline_seconds"] = previous[key]
+            result["regressed"] = result["seconds"] > previous[key] * (1 + tolerance) + noise_seconds
+            if result["regressed"]:
+                regressions.append(result)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", choices=list(fleets), default=["small", "medium"])
+    parser.add_argument("--materialization", choices=["view", "table", "incremental"], default="table")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="Writes the results as a JSON list.")
+    parser.add_argument("--baseline", help="Results of a previous run to check for regressions.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown relative to the baseline.")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        results.extend(benchmark(size, fleets[size], args.materialization, args.repeats))
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = check_regressions(results, json.load(file), args.tolerance)
+    for result in results:
+        print(json.dumps(result))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+            file.write("\n")
+    if regressions:
+        names = ", ".join(f"{result['size']}/{result['query']}" for result in regressions)
+        print(f"Regressions over {args.tolerance:.0%}: {names}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
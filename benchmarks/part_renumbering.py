@@ -0,0 +1,205 @@
+"""Compares window and offset renumbering of part telemetry on generated data.
+
+The window form is the original part_telemetry view (LAG and running sums over every
+record of a part). The offset form joins the per-test offsets of the test_part_offsets
+model. Both forms are checked for identical numbering before timing.
+
+Usage: python benchmarks/part_renumbering.py --parts 100 --tests-per-part 4 --records-per-test 10000
+"""
+
+import argparse
+import json
+import time
+
+import duckdb
+
+window_form = """
+CREATE OR REPLACE VIEW part_telemetry_window AS
+WITH test_with_part AS (
+    SELECT dpt.part_id, t.*
+    FROM telemetry AS t
+    INNER JOIN device_test_part AS dpt
+        ON t.device_id = dpt.device_id
+        AND t.test_id = dpt.test_id
+),
+
+lagged AS (
+    SELECT
+        *,
+        LAG(cycle_number) OVER part_window AS prev_cycle_number,
+        LAG(step_number) OVER part_window AS prev_step_number
+    FROM test_with_part
+    WINDOW part_window AS (PARTITION BY part_id ORDER BY timestamp, record_number)
+)
+
+SELECT
+    *,
+    SUM(CASE WHEN prev_cycle_number IS DISTINCT FROM cycle_number THEN 1 ELSE 0 END) OVER part_window AS part_cycle_number,
+    SUM(CASE WHEN prev_step_number IS DISTINCT FROM step_number THEN 1 ELSE 0 END) OVER part_window AS part_step_number,
+    ROW_NUMBER() OVER part_window AS part_record_number
+FROM lagged
+WINDOW part_window AS (
+    PARTITION BY part_id
+    ORDER BY timestamp, record_number
+    ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+)
+"""
+
+offset_form = """
+CREATE OR REPLACE VIEW test_part_offsets AS
+WITH test_extent AS (
+    SELECT
+        device_id,
+        test_id,
+        MIN(start_time) AS start_time,
+        MAX(cycle_number) AS max_cycle_number,
+        MAX(step_number) AS max_step_number,
+        SUM(num_records) AS num_records
+    FROM statistics_step
+    GROUP BY device_id, test_id
+),
+
+test_with_part AS (
+    SELECT
+        dpt.part_id,
+        dpt.device_id,
+        dpt.test_id,
+        te.start_time,
+        COALESCE(te.max_cycle_number, 0) AS max_cycle_number,
+        COALESCE(te.max_step_number, 0) AS max_step_number,
+        COALESCE(te.num_records, 0) AS num_records
+    FROM device_test_part AS dpt
+    LEFT JOIN test_extent AS te
+        ON dpt.device_id = te.device_id
+        AND dpt.test_id = te.test_id
+)
+
+SELECT
+    *,
+    COALESCE(SUM(max_cycle_number) OVER earlier_tests, 0) AS cycle_offset,
+    COALESCE(SUM(max_step_number) OVER earlier_tests, 0) AS step_offset,
+    COALESCE(SUM(num_records) OVER earlier_tests, 0) AS record_offset
+FROM test_with_part
+WINDOW earlier_tests AS (
+    PARTITION BY part_id
+    ORDER BY start_time ASC NULLS LAST, test_id
+    ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+);
+
+CREATE OR REPLACE VIEW part_telemetry_offsets AS
+SELECT
+    o.part_id,
+    t.*,
+    o.cycle_offset + t.cycle_number AS part_cycle_number,
+    o.step_offset + t.step_number AS part_step_number,
+    o.record_offset + t.record_number AS part_record_number
+FROM telemetry AS t
+INNER JOIN test_part_offsets AS o
+    ON t.device_id = o.device_id
+    AND t.test_id = o.test_id
+"""
+
+queries = {  # name, query against a part telemetry view
+    "part_extent": "SELECT part_id, MAX(part_cycle_number), MAX(part_step_number), MAX(part_record_number) FROM {view} GROUP BY part_id",
+    "part_cycle_slice": "SELECT COUNT(*), AVG(voltage__V) FROM {view} WHERE part_id = 0 AND part_cycle_number BETWEEN 2 AND 4",
+}
+
+
+def generate(conn, parts, tests_per_part, records_per_test, records_per_step, steps_per_cycle):
+    # Each part is put on test several times, one test after the other (10 Hz records)
+    conn.execute(
+        """
+        CREATE OR REPLACE TABLE device_test_part AS
+        SELECT 'device-' || p.part_id AS device_id, 'test-' || p.part_id || '-' || t.test_number AS test_id, p.part_id, t.test_number
+        FROM range($parts) AS p(part_id), range($tests) AS t(test_number)
+        """,
+        {"parts": parts, "tests": tests_per_part},
+    )
+    conn.execute(
+        """
+        CREATE OR REPLACE TABLE telemetry AS
+        SELECT
+            dtp.device_id,
+            dtp.test_id,
+            CAST(r.record // ($records_per_step * $steps_per_cycle) + 1 AS INTEGER) AS cycle_number,
+            r.record // $records_per_step + 1 AS step_number,
+            r.record + 1 AS record_number,
+            TIMESTAMP '2024-01-01' + TO_MILLISECONDS((dtp.test_number * $records_per_test + r.record) * 100) AS timestamp,
+            3.0 + (r.record % $records_per_step) / $records_per_step AS voltage__V
+        FROM device_test_part AS dtp, range($records_per_test) AS r(record)
+        """,
+        {
+            "records_per_test": records_per_test,
+            "records_per_step": records_per_step,
+            "steps_per_cycle": steps_per_cycle,
+        },
+    )
+    conn.execute(
+        """
+        CREATE OR REPLACE TABLE statistics_step AS
+        SELECT device_id, test_id, cycle_number, step_number, MIN(timestamp) AS start_time, COUNT(*) AS num_records
+        FROM telemetry
+        GROUP BY device_id, test_id, cycle_number, step_number
+        """
+    )
+
+
+def check_equivalence(conn):
+    mismatches = conn.execute(
+        """
+        SELECT COUNT(*)
+        FROM part_telemetry_window AS w
+        FULL OUTER JOIN part_telemetry_offsets AS o
+            ON w.test_id = o.test_id
+            AND w.record_number = o.record_number
+        WHERE w.part_cycle_number IS DISTINCT FROM o.part_cycle_number
+            OR w.part_step_number IS DISTINCT FROM o.part_step_number
+            OR w.part_record_number IS DISTINCT FROM o.part_record_number
+        """
+    ).fetchone()[0]
+    if mismatches:
+        raise AssertionError(f"Window and offset renumbering differ on {mismatches} records.")
+
+
+def time_query(conn, query, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        conn.execute(query).fetchall()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--parts", type=int, default=100)
+    parser.add_argument("--tests-per-part", type=int, default=4)
+    parser.add_argument("--records-per-test", type=int, default=10_000)
+    parser.add_argument("--records-per-step", type=int, default=100)
+    parser.add_argument("--steps-per-cycle", type=int, default=3)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    conn = duckdb.connect()
+    generate(conn, args.parts, args.tests_per_part, args.records_per_test, args.records_per_step, args.steps_per_cycle)
+    conn.execute(window_form)
+    conn.execute(offset_form)
+    check_equivalence(conn)
+
+    num_records = conn.execute("SELECT COUNT(*) FROM telemetry").fetchone()[0]
+    for name, query in queries.items():
+        window_seconds = time_query(conn, query.format(view="part_telemetry_window"), args.repeats)
+        offset_seconds = time_query(conn, query.format(view="part_telemetry_offsets"), args.repeats)
+        result = {
+            "query": name,
+            "num_records": num_records,
+            "window_seconds": round(window_seconds, 4),
+            "offset_seconds": round(offset_seconds, 4),
+            "speedup": round(window_seconds / offset_seconds, 2),
+        }
+        print(json.dumps(result))
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()